@@ -1,2 +1,7 @@
+from cereal.context import *  # noqa
+from cereal.delta import *  # noqa
+from cereal.encoders import *  # noqa
 from cereal.fields import *  # noqa
+from cereal.loaders import *  # noqa
+from cereal.rows import *  # noqa
 from cereal.serializer import *  # noqa
@@ -3,3 +3,4 @@ from django.apps import AppConfig
 
 class CerealAppConfig(AppConfig):
     name = 'cereal'
+    default_auto_field = 'django.db.models.AutoField'
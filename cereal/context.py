@@ -0,0 +1,19 @@
+__all__ = ['Context']
+
+
+class Context:
+    """ The state of a single serialization call. serialize() creates a new
+        Context for each call and passes it down to every field and nested
+        serializer, which keeps the serializer instances free of per-call
+        state so they can be shared between threads. loaded holds the
+        values fetched by each Loader during the call, and tables the
+        handler and converter tables frozen serializers build for an
+        encoder they were not frozen with.
+    """
+
+    __slots__ = ('encoder', 'loaded', 'tables')
+
+    def __init__(self, encoder=None):
+        self.encoder = encoder
+        self.loaded = {}
+        self.tables = {}
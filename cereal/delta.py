@@ -0,0 +1,98 @@
+import hashlib
+import json
+
+
+__all__ = ['Fingerprint', 'depends_on', 'merge_patch']
+
+
+class Fingerprint(dict):
+    """ Per-field digests of a serialized object, as returned by
+        Serializer.fingerprint_ and Serializer.delta_. Nested dicts are
+        fingerprinted key by key so changes inside them produce nested
+        patches. The contents are plain strings and dicts and can be stored
+        as JSON; wrap the loaded dict in Fingerprint before reusing it.
+    """
+    pass
+
+
+def depends_on(*attrs):
+    """ Declare the source attributes a serialize_NAME() method reads.
+        When diffing against a Fingerprint the method is only called if
+        one of these attributes has changed.
+
+        The attributes must hold primitive values, or lists, sets and
+        dicts of them, that the serializer's handlers can serialize.
+        Other objects are digested as their str(), which for objects
+        without __str__ includes their memory address and changes on
+        every load.
+    """
+
+    def decorator(method):
+        method.depends_on = attrs
+        return method
+
+    return decorator
+
+
+def canonical_json(value):
+    """ Encode a serialized value as JSON with sorted keys, so equal
+        values always produce the same string.
+    """
+    return json.dumps(value, sort_keys=True, separators=(',', ':'),
+                      default=str)
+
+
+def _digest(value):
+    return hashlib.blake2b(
+        canonical_json(value).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def fingerprint_value(value):
+    if isinstance(value, dict):
+        return {k: fingerprint_value(v) for k, v in value.items()}
+    return _digest(value)
+
+
+def fingerprint_patch(previous, current, value, removed=None):
+    """ Compare the fingerprint of a value with a previous one and return
+        (changed, patch) where patch is the part of value to send. Keys
+        that no longer exist are set to removed.
+    """
+    if previous == current:
+        return False, None
+    if not isinstance(previous, dict) or not isinstance(current, dict):
+        return True, value
+    patch = {}
+    for k, v in value.items():
+        changed, sub_patch = fingerprint_patch(
+            previous.get(k), current[k], v, removed)
+        if changed:
+            patch[k] = sub_patch
+    for k in previous:
+        if k not in current:
+            patch[k] = removed
+    return True, patch
+
+
+def merge_patch(previous, current, removed=None):
+    """ Return a JSON Merge Patch (RFC 7396) that turns previous into
+        current. Removed keys are set to None and lists are replaced whole.
+
+        RFC 7396 has no way to set a key to null: a consumer applying the
+        patch removes every key whose value is None, including those whose
+        new value is None. Pass a different removed value, such as a
+        marker string, to tell the two apart; the patch is then no longer
+        a standard merge patch.
+    """
+    if not isinstance(previous, dict) or not isinstance(current, dict):
+        return current
+    patch = {}
+    for k, v in current.items():
+        if k not in previous:
+            patch[k] = v
+        elif previous[k] != v:
+            patch[k] = merge_patch(previous[k], v, removed)
+    for k in previous:
+        if k not in current:
+            patch[k] = removed
+    return patch
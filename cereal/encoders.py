@@ -0,0 +1,138 @@
+import datetime
+import decimal
+import json
+import uuid
+
+from .rows import Row
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+
+__all__ = ['Encoder', 'JSONEncoder', 'MessagePackEncoder', 'CBOREncoder',
+           'get_encoder', 'register_encoder']
+
+
+def _native(value):
+    return value
+
+
+def _row_default(value):
+    if isinstance(value, Row):
+        return value.asdict()
+    raise TypeError('Object of type {} is not serializable'.format(
+        type(value).__name__))
+
+
+class Encoder:
+    """ The base class for all output formats.
+
+        An encoder turns the plain data built by a serializer into its
+        final representation. Types listed in `handlers` are converted by
+        the encoder instead of by the serializer's default handlers, which
+        lets a format keep values it supports natively. Handlers added to
+        a serializer with add_handler still take precedence.
+    """
+
+    handlers = {}
+
+    def encode(self, data):
+        raise NotImplementedError('encoders must implement encode()')
+
+
+class JSONEncoder(Encoder):
+
+    def encode(self, data):
+        return json.dumps(data, default=_row_default)
+
+
+class MessagePackEncoder(Encoder):
+    """ Encodes to MessagePack. Datetimes are written as native timestamps.
+        Naive datetimes have no defined instant, so encoding one raises a
+        ValueError unless timezone, the zone they are in, is given.
+        Requires the msgpack package.
+    """
+
+    handlers = {
+        bytes: _native,
+        datetime.datetime: _native,
+    }
+
+    def __init__(self, timezone=None):
+        if msgpack is None:
+            raise ImportError('msgpack is required for MessagePack output')
+        self.timezone = timezone
+
+    def _default(self, value):
+        # msgpack packs aware datetimes itself and passes naive ones here
+        if isinstance(value, datetime.datetime):
+            if self.timezone is None:
+                raise ValueError(
+                    'naive datetime {} needs a timezone to be encoded, '
+                    'see MessagePackEncoder'.format(value))
+            return msgpack.Timestamp.from_datetime(
+                value.replace(tzinfo=self.timezone))
+        return _row_default(value)
+
+    def encode(self, data):
+        return msgpack.packb(data, datetime=True, default=self._default)
+
+
+class CBOREncoder(Encoder):
+    """ Encodes to CBOR. Dates, datetimes, decimals, UUIDs and bytes are
+        written using their native CBOR tags. Encoding a naive datetime
+        raises an error unless timezone, the zone it is in, is given.
+        Requires the cbor2 package.
+    """
+
+    handlers = {
+        bytes: _native,
+        datetime.date: _native,
+        datetime.datetime: _native,
+        decimal.Decimal: _native,
+        uuid.UUID: _native,
+    }
+
+    def __init__(self, timezone=None):
+        if cbor2 is None:
+            raise ImportError('cbor2 is required for CBOR output')
+        self.timezone = timezone
+
+    def encode(self, data):
+        return cbor2.dumps(
+            data, timezone=self.timezone,
+            default=lambda e, v: e.encode(_row_default(v)))
+
+
+_encoders = {
+    'json': JSONEncoder,
+    'msgpack': MessagePackEncoder,
+    'cbor': CBOREncoder,
+}
+
+
+def register_encoder(name, encoder_class):
+    if not issubclass(encoder_class, Encoder):
+        raise ValueError('encoder_class must be a subclass of Encoder')
+    _encoders[name] = encoder_class
+
+
+def encoder_classes():
+    return list(_encoders.values())
+
+
+def get_encoder(format):
+    if isinstance(format, Encoder):
+        return format
+    try:
+        encoder_class = _encoders[format]
+    except KeyError:
+        raise ValueError('unknown format: {}'.format(format))
+    return encoder_class()
@@ -1,3 +1,7 @@
+import threading
+
+from .context import Context
+from .loaders import load
 from .utils import get_attribute_or_key
 
 
@@ -29,34 +33,81 @@ class ConstantField(BaseField):
 
 
 class SerializerField(BaseField):
+    """ Serializes a nested object, or list of objects, with another
+        serializer. With a loader, the nested objects are fetched from the
+        loader by the keys found in the key attribute of the object,
+        batched across all objects passed to serialize().
 
-    def __init__(self, serializer):
-        self._serializer = serializer()
+        Each serializer instance creates its own instance of the nested
+        serializer and passes it to value().
+    """
 
-    def value(self, obj, name):
+    def __init__(self, serializer, loader=None, key=None):
+        if loader is not None and key is None:
+            raise ValueError('key is required when using a loader')
+        self.serializer_class = serializer
+        self.loader = loader
+        self.key = key
+
+    def _loaded_value(self, obj, serializer, context):
+        keys = get_attribute_or_key(obj, self.key)
+        many = isinstance(keys, (list, tuple, set))
+        values = load(self.loader, list(keys) if many else [keys], context)
+        results = [None if v is None else serializer.asdict_(v, context)
+                   for v in values]
+        return results if many else results[0]
+
+    def value(self, obj, name, context=None, serializer=None):
+        if serializer is None:
+            serializer = self.serializer_class()
+        if self.loader is not None:
+            return self._loaded_value(obj, serializer, context or Context())
         other = get_attribute_or_key(obj, name)
+        asdict_ = serializer.asdict_
         if isinstance(other, (list, tuple, set)):
-            return [self._serializer.asdict_(o) for o in other]
+            return [asdict_(o, context) for o in other]
         elif hasattr(other, 'objects'):
-            return [self._serializer.asdict_(o) for o in other.objects.all()]
-        return self._serializer.asdict_(other)
+            return [asdict_(o, context) for o in other.objects.all()]
+        return asdict_(other, context)
 
 
 class IteratorField(BaseField):
     """ Returns next value from iterator until StopIteration occurs.
         Once the iterator has been exhausted, this field will return None.
+
+        The iterator is shared by all threads and guarded by a lock. With
+        per_thread=True each thread gets its own iterator instead, created
+        from container, which must then be re-iterable or a callable
+        returning an iterable.
     """
 
-    def __init__(self, container):
-        self._iter = iter(container)
+    def __init__(self, container, per_thread=False):
+        self._container = container
+        self._per_thread = per_thread
+        if per_thread:
+            self._local = threading.local()
+        else:
+            self._iter = iter(container)
+            self._lock = threading.Lock()
+
+    def _next(self, state):
+        if state._iter:
+            try:
+                return next(state._iter)
+            except StopIteration:
+                state._iter = None
 
     def value(self, obj, name):
         """ Return next value from the iterator
             or None if StopIteration has occured.
         """
-        if self._iter:
-            try:
-                v = next(self._iter)
-                return v
-            except StopIteration:
-                self._iter = None
+        if self._per_thread:
+            state = self._local
+            if not hasattr(state, '_iter'):
+                container = self._container
+                if callable(container):
+                    container = container()
+                state._iter = iter(container)
+            return self._next(state)
+        with self._lock:
+            return self._next(self)
@@ -0,0 +1,168 @@
+import collections
+import json
+import os
+
+from django.db import transaction
+
+from .context import Context
+from .keyset import ordering_fields, parse_ordering, seek
+
+
+__all__ = ['CheckpointStore', 'FileCheckpointStore',
+           'DatabaseCheckpointStore', 'export_changes']
+
+
+class CheckpointStore:
+    """ Persists the position reached by export_changes under a key.
+        Values are JSON-compatible lists.
+    """
+
+    def load(self, key):
+        raise NotImplementedError('checkpoint stores must implement load()')
+
+    def save(self, key, value):
+        raise NotImplementedError('checkpoint stores must implement save()')
+
+
+class FileCheckpointStore(CheckpointStore):
+    """ Stores checkpoints in a JSON file, replaced atomically on save.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def load(self, key):
+        return self._read().get(key)
+
+    def save(self, key, value):
+        checkpoints = self._read()
+        checkpoints[key] = value
+        tmp_path = '{}.tmp'.format(self.path)
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoints, f)
+        os.replace(tmp_path, self.path)
+
+
+class DatabaseCheckpointStore(CheckpointStore):
+    """ Stores checkpoints in the cereal Checkpoint table. Requires cereal
+        in INSTALLED_APPS.
+    """
+
+    def __init__(self, using=None):
+        self.using = using
+
+    def load(self, key):
+        from .models import Checkpoint
+        value = Checkpoint.objects.using(self.using).filter(
+            key=key).values_list('value', flat=True).first()
+        return None if value is None else json.loads(value)
+
+    def save(self, key, value):
+        from .models import Checkpoint
+        with transaction.atomic(using=self.using):
+            Checkpoint.objects.using(self.using).update_or_create(
+                key=key, defaults={'value': json.dumps(value)})
+
+
+def _window_key(obj, watermark):
+    return json.loads(json.dumps(
+        [obj.pk, getattr(obj, watermark)], default=str))
+
+
+def export_changes(serializer, watermark, store, queryset=None, key=None,
+                   tombstones=None, batch_size=1000, lag=None):
+    """ Yield the serialized rows changed since the previous run.
+
+        Rows are selected where the watermark column, such as updated_at,
+        is past the checkpoint loaded from store, and read in batches in
+        (watermark, pk) order using a seek predicate. The checkpoint is only
+        advanced once every row has been yielded, so an export that is
+        interrupted is repeated in full by the next run.
+
+        Without lag, a row is only exported if its watermark is past the
+        checkpoint when export_changes reads it. A transaction that sets a
+        watermark but commits after a newer row was exported is missed.
+        lag, a value that can be subtracted from the watermark such as a
+        timedelta, makes each run read again from the checkpoint minus lag.
+        The checkpoint records the (pk, watermark) pairs of the rows in
+        that window, so rows already exported are skipped. Every row that
+        commits within lag of the newest exported watermark is exported
+        exactly once.
+
+        tombstones is an optional callable receiving the previous watermark
+        value, converted back to the watermark field's type (None on the
+        first run), and returning the primary keys of the rows deleted
+        since then. Each is yielded as {'pk': pk, 'deleted': True} after
+        the changed rows. Deletions are reported again by later runs until
+        a changed row advances the checkpoint.
+    """
+
+    if queryset is None:
+        queryset = serializer.Meta.model._default_manager.all()
+    if key is None:
+        key = '{}:{}'.format(queryset.model._meta.label_lower, watermark)
+
+    ordering = parse_ordering((watermark, 'pk'))
+    fields = ordering_fields(queryset.model, ordering)
+    queryset = queryset.order_by(*(name for name, _ in ordering))
+
+    checkpoint = store.load(key)
+    since = position = seen = None
+    if checkpoint is not None:
+        position = [f.to_python(v) for f, v in zip(fields, checkpoint)]
+        since = position[0]
+        seen = {tuple(k) for k in checkpoint[2]} if len(checkpoint) > 2 \
+            else set()
+    if lag is not None and since is not None:
+        queryset = queryset.filter(
+            **{'{}__gte'.format(watermark): since - lag})
+        position = None
+
+    # (watermark, key) of the rows read so far that are within lag of the
+    # newest one, oldest first
+    window = collections.deque()
+    exported = False
+
+    while True:
+        batch = queryset
+        if position is not None:
+            batch = batch.filter(seek(ordering, position, True))
+        batch = list(batch[:batch_size])
+        if not batch:
+            break
+        if lag is not None:
+            new = []
+            for obj in batch:
+                window_key = _window_key(obj, watermark)
+                window.append((getattr(obj, watermark), window_key))
+                if seen is None or tuple(window_key) not in seen:
+                    new.append(obj)
+            newest = window[-1][0]
+            while window[0][0] < newest - lag:
+                window.popleft()
+        else:
+            new = batch
+        context = Context()
+        if serializer.has_loaders:
+            serializer.prefetch_(new, context)
+        for obj in new:
+            yield serializer.asdict_(obj, context)
+        exported = exported or bool(new)
+        last = batch[-1]
+        position = [f.value_from_object(last) for f in fields]
+
+    if tombstones is not None:
+        for pk in tombstones(since):
+            yield {'pk': pk, 'deleted': True}
+
+    if exported:
+        value = json.loads(json.dumps(position, default=str))
+        if lag is not None:
+            value.append([k for _, k in window])
+        store.save(key, value)
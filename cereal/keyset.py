@@ -0,0 +1,36 @@
+from django.db.models import Q
+
+
+__all__ = ['parse_ordering', 'ordering_fields', 'seek']
+
+
+def parse_ordering(ordering):
+    """ Split ordering into (field, descending) pairs. The primary key is
+        appended when missing so that every row has a unique position.
+    """
+    parsed = [(f.lstrip('-'), f.startswith('-')) for f in ordering]
+    if not any(name in ('pk', 'id') for name, _ in parsed):
+        parsed.append(('pk', parsed[-1][1] if parsed else False))
+    return parsed
+
+
+def ordering_fields(model, ordering):
+    """ Return the model field of each (name, descending) pair.
+    """
+    opts = model._meta
+    return [opts.pk if name == 'pk' else opts.get_field(name)
+            for name, _ in ordering]
+
+
+def seek(ordering, values, forward):
+    """ Build the predicate selecting the rows that come after values
+        (or before them when forward is False) in the given ordering.
+    """
+    q = Q()
+    for i, (name, descending) in enumerate(ordering):
+        op = 'lt' if descending == forward else 'gt'
+        clause = Q(**{'{}__{}'.format(name, op): values[i]})
+        for j, (prev_name, _) in enumerate(ordering[:i]):
+            clause &= Q(**{prev_name: values[j]})
+        q |= clause
+    return q
@@ -0,0 +1,74 @@
+import asyncio
+import inspect
+
+
+__all__ = ['Loader']
+
+
+class Loader:
+    """ Fetches the values of a SerializerField in batches.
+
+        Subclasses implement load_many(keys), returning a dict mapping each
+        key to its value; keys without a value may be left out. load_many
+        may also be a coroutine function. Within one serialize call every
+        key is loaded at most once.
+    """
+
+    def load_many(self, keys):
+        raise NotImplementedError('loaders must implement load_many()')
+
+
+async def _wait(awaitable):
+    return await awaitable
+
+
+def _missing(loader, keys, context):
+    cache = context.loaded.setdefault(loader, {})
+    missing = list(dict.fromkeys(
+        k for k in keys if k is not None and k not in cache))
+    return cache, missing
+
+
+def _store(cache, missing, result, keys):
+    for k in missing:
+        cache[k] = result.get(k)
+    return [None if k is None else cache[k] for k in keys]
+
+
+def load(loader, keys, context):
+    """ Return the values for keys, in order, calling the loader once for
+        the keys that have not been loaded yet in this context. None is
+        returned for None keys and keys the loader did not find.
+
+        A coroutine returned by an async loader is run in a new event
+        loop, which is not possible from async code; use aserialize there.
+    """
+    cache, missing = _missing(loader, keys, context)
+    result = {}
+    if missing:
+        result = loader.load_many(missing)
+        if inspect.isawaitable(result):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                result = asyncio.run(_wait(result))
+            else:
+                if inspect.iscoroutine(result):
+                    result.close()
+                raise RuntimeError(
+                    '{} is async and an event loop is running, use '
+                    'aserialize() instead of serialize()'.format(
+                        type(loader).__name__))
+    return _store(cache, missing, result, keys)
+
+
+async def aload(loader, keys, context):
+    """ Like load, awaiting the result of async loaders.
+    """
+    cache, missing = _missing(loader, keys, context)
+    result = {}
+    if missing:
+        result = loader.load_many(missing)
+        if inspect.isawaitable(result):
+            result = await result
+    return _store(cache, missing, result, keys)
@@ -0,0 +1,246 @@
+import gzip
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils.module_loading import import_string
+
+from cereal.context import Context
+from cereal.encoders import JSONEncoder
+
+
+FORMATS = ('json', 'ndjson')
+
+
+def _load_serializer(path):
+    try:
+        serializer_class = import_string(path)
+    except ImportError as e:
+        raise CommandError('unable to import serializer: {}'.format(e))
+    meta = getattr(serializer_class, 'Meta', None)
+    if getattr(meta, 'model', None) is None:
+        raise CommandError('{} does not define Meta.model'.format(path))
+    return serializer_class
+
+
+def _init_worker():
+    django.setup()
+
+
+def _write_checkpoint(path, checkpoint):
+    tmp_path = '{}.tmp'.format(path)
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def export_shard(serializer_path, filters, lower, upper, path,
+                 format='json', batch_size=1000):
+    """ Export rows with lower < pk <= upper to path, walking the range
+        in pk order with a seek predicate instead of OFFSET. The file is
+        written under a temporary name and moved into place once the
+        shard is complete. Returns (pid, rows, seconds).
+    """
+
+    serializer = _load_serializer(serializer_path)()
+    encoder = JSONEncoder()
+    model = serializer.Meta.model
+    queryset = model._default_manager.filter(**filters).order_by('pk')
+
+    opener = gzip.open if path.endswith('.gz') else open
+    tmp_path = '{}.tmp'.format(path)
+    started = time.monotonic()
+    rows = 0
+
+    with opener(tmp_path, 'wt') as f:
+        if format == 'json':
+            f.write('[')
+        last = lower
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last, pk__lte=upper)[:batch_size])
+            if not batch:
+                break
+            context = Context(encoder)
+            if serializer.has_loaders:
+                serializer.prefetch_(batch, context)
+            for obj in batch:
+                if format == 'json' and rows:
+                    f.write(',')
+                f.write(encoder.encode(serializer.asdict_(obj, context)))
+                if format == 'ndjson':
+                    f.write('\n')
+                rows += 1
+            last = batch[-1].pk
+        if format == 'json':
+            f.write(']')
+
+    os.replace(tmp_path, path)
+    return os.getpid(), rows, time.monotonic() - started
+
+
+class Command(BaseCommand):
+    help = 'Export a model table through a cereal serializer, ' \
+           'split into pk-range shards exported in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'serializer',
+            help='dotted path to a Serializer with Meta.model')
+        parser.add_argument(
+            '--filter', action='append', default=[], dest='filters',
+            metavar='LOOKUP=VALUE',
+            help='QuerySet filter, may be given more than once')
+        parser.add_argument(
+            '--output-dir', default='.',
+            help='directory in which shard files are written')
+        parser.add_argument('--format', choices=FORMATS, default='json')
+        parser.add_argument(
+            '--gzip', action='store_true', help='gzip the shard files')
+        parser.add_argument('--shards', type=int, default=None)
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint', default=None,
+            help='checkpoint file, defaults to one in the output directory')
+
+    def _parse_filters(self, filters):
+        parsed = {}
+        for f in filters:
+            lookup, sep, value = f.partition('=')
+            if not sep or not lookup:
+                raise CommandError('invalid filter: {}'.format(f))
+            parsed[lookup] = value
+        return parsed
+
+    def _plan_shards(self, model, filters, count):
+        bounds = model._default_manager.filter(**filters).aggregate(
+            lo=Min('pk'), hi=Max('pk'))
+        lo, hi = bounds['lo'], bounds['hi']
+        if lo is None:
+            return []
+        if not isinstance(lo, int):
+            raise CommandError('pk-range sharding requires an integer pk')
+        step = max(1, math.ceil((hi - lo + 1) / count))
+        return [[start, min(start + step, hi)]
+                for start in range(lo - 1, hi, step)]
+
+    def handle(self, *args, **options):
+        serializer_path = options['serializer']
+        serializer_class = _load_serializer(serializer_path)
+        model = serializer_class.Meta.model
+        filters = self._parse_filters(options['filters'])
+        workers = options['workers'] or 1
+        fmt = options['format']
+        compress = bool(options['gzip'])
+
+        for option in ('workers', 'shards', 'batch_size'):
+            if options[option] is not None and options[option] < 1:
+                raise CommandError(
+                    '--{} must be at least 1'.format(option.replace('_', '-')))
+
+        output_dir = options['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        prefix = model._meta.db_table
+        suffix = '.{}{}'.format(fmt, '.gz' if compress else '')
+
+        checkpoint_path = options['checkpoint'] or os.path.join(
+            output_dir, '{}.checkpoint.json'.format(prefix))
+
+        checkpoint = None
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('serializer') != serializer_path or \
+                    checkpoint.get('filters') != filters or \
+                    checkpoint.get('format') != fmt or \
+                    checkpoint.get('gzip') != compress:
+                raise CommandError(
+                    'checkpoint {} belongs to a different export'.format(
+                        checkpoint_path))
+            if options['shards'] is not None and \
+                    options['shards'] != checkpoint.get('shard_count'):
+                raise CommandError(
+                    'checkpoint {} was created with --shards {}'.format(
+                        checkpoint_path, checkpoint.get('shard_count')))
+            self.stdout.write('resuming from {}'.format(checkpoint_path))
+        else:
+            shard_count = options['shards'] or workers
+            checkpoint = {
+                'serializer': serializer_path,
+                'filters': filters,
+                'format': fmt,
+                'gzip': compress,
+                'shard_count': shard_count,
+                'shards': self._plan_shards(model, filters, shard_count),
+                'done': [],
+            }
+            _write_checkpoint(checkpoint_path, checkpoint)
+
+        pending = [
+            (i, lower, upper)
+            for i, (lower, upper) in enumerate(checkpoint['shards'])
+            if i not in checkpoint['done']
+        ]
+
+        def shard_args(i, lower, upper):
+            path = os.path.join(
+                output_dir, '{}-{:04d}{}'.format(prefix, i, suffix))
+            return (serializer_path, filters, lower, upper, path,
+                    fmt, options['batch_size'])
+
+        def report(i, result):
+            pid, rows, seconds = result
+            rate = rows / seconds if seconds else float(rows)
+            self.stdout.write(
+                'shard {} (pid {}): {} rows in {:.2f}s, {:.0f} rows/sec'
+                .format(i, pid, rows, seconds, rate))
+            checkpoint['done'].append(i)
+            _write_checkpoint(checkpoint_path, checkpoint)
+
+        def fail(i, error):
+            raise CommandError(
+                'shard {} failed: {}'.format(i, error)) from error
+
+        if workers == 1:
+            for i, lower, upper in pending:
+                try:
+                    result = export_shard(*shard_args(i, lower, upper))
+                except Exception as e:
+                    fail(i, e)
+                report(i, result)
+        else:
+            # connections must not be shared with forked workers
+            connections.close_all()
+            failed = None
+            with ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_worker) as pool:
+                futures = {
+                    pool.submit(export_shard, *shard_args(i, lower, upper)): i
+                    for i, lower, upper in pending
+                }
+                # after a failure the queued shards are cancelled, while
+                # those already running are still recorded as they finish
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    error = future.exception()
+                    if error is None:
+                        report(futures[future], future.result())
+                    elif failed is None:
+                        failed = futures[future], error
+                        pool.shutdown(wait=False, cancel_futures=True)
+            if failed is not None:
+                fail(*failed)
+
+        # the export is complete, the next run starts a new one
+        os.remove(checkpoint_path)
+
+        self.stdout.write('exported {} shards to {}'.format(
+            len(checkpoint['shards']), output_dir))
@@ -0,0 +1,10 @@
+from django.db import models
+
+
+class Checkpoint(models.Model):
+    """ The last exported position of an incremental export,
+        used by DatabaseCheckpointStore.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    value = models.TextField()
+    updated = models.DateTimeField(auto_now=True)
@@ -0,0 +1,108 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+
+from .context import Context
+from .keyset import ordering_fields, parse_ordering, seek
+
+
+__all__ = ['CursorPage', 'paginate']
+
+
+CursorPage = namedtuple(
+    'CursorPage', ['results', 'next_cursor', 'previous_cursor'])
+
+
+def _encode_cursor(obj, fields, direction):
+    # value_from_object reads the column, the pk of a related row included
+    values = [field.value_from_object(obj) for field in fields]
+    payload = json.dumps([direction, values], default=str)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor, fields):
+    """ Return the (direction, values) of a cursor sent by a client, with
+        each value converted by its ordering field. Anything that isn't a
+        cursor built by paginate raises ValueError('invalid cursor').
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode('ascii'))
+        direction, values = json.loads(payload.decode('utf-8'))
+    except (binascii.Error, UnicodeError, TypeError, ValueError):
+        raise ValueError('invalid cursor')
+    if direction not in ('next', 'prev') or \
+            not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError('invalid cursor')
+    if not all(isinstance(v, (str, int, float)) for v in values):
+        raise ValueError('invalid cursor')
+    try:
+        values = [f.to_python(v) for f, v in zip(fields, values)]
+    except (TypeError, ValueError, ValidationError):
+        raise ValueError('invalid cursor')
+    return direction, values
+
+
+def paginate(serializer, queryset=None, cursor=None, ordering=('pk',),
+             limit=50):
+    """ Return a CursorPage of serialized rows using keyset pagination.
+
+        Rows are located with a seek predicate on the ordering columns
+        rather than an OFFSET, so the cost of a page does not grow with its
+        depth. The cursors are opaque strings built from the ordering values
+        of the first and last rows; pass one back as `cursor` to fetch the
+        neighbouring page. Ordering columns must be fields of the model
+        and must not be nullable.
+    """
+
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+
+    if queryset is None:
+        meta = getattr(serializer, 'Meta', None)
+        model = getattr(meta, 'model', None)
+        if model is None:
+            raise ValueError('queryset is required without Meta.model')
+        queryset = model._default_manager.all()
+
+    ordering = parse_ordering(ordering)
+    fields = ordering_fields(queryset.model, ordering)
+    forward = True
+    values = None
+    if cursor:
+        direction, values = _decode_cursor(cursor, fields)
+        forward = direction == 'next'
+
+    # backward pages are fetched in reverse order and flipped afterwards
+    order_by = [
+        '{}{}'.format('-' if descending == forward else '', name)
+        for name, descending in ordering
+    ]
+
+    if values is not None:
+        queryset = queryset.filter(seek(ordering, values, forward))
+
+    rows = list(queryset.order_by(*order_by)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+
+    if forward:
+        has_next, has_previous = has_more, values is not None
+    else:
+        has_next, has_previous = True, has_more
+
+    next_cursor = previous_cursor = None
+    if rows and has_next:
+        next_cursor = _encode_cursor(rows[-1], fields, 'next')
+    if rows and has_previous:
+        previous_cursor = _encode_cursor(rows[0], fields, 'prev')
+
+    context = Context()
+    if serializer.has_loaders:
+        serializer.prefetch_(rows, context)
+    results = [serializer.asdict_(obj, context) for obj in rows]
+    return CursorPage(results, next_cursor, previous_cursor)
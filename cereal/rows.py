@@ -0,0 +1,55 @@
+from collections.abc import Mapping
+
+
+__all__ = ['Row']
+
+
+class Row(Mapping):
+    """ A read-only mapping over a tuple of values. Each serializer class
+        has its own Row subclass holding the field names, so a row only
+        stores its values. Use asdict() to get a real dict.
+    """
+
+    __slots__ = ('_values',)
+
+    _keys = ()
+    _index = {}
+
+    def __init__(self, values):
+        self._values = values
+
+    @classmethod
+    def for_keys(cls, name, keys, module=None, qualname=None):
+        """ Create the Row subclass for keys. Rows can be pickled when
+            module and qualname locate the class, for example the row_class
+            attribute of a module level serializer.
+        """
+        keys = tuple(keys)
+        attrs = {
+            '__slots__': (),
+            '_keys': keys,
+            '_index': {k: i for i, k in enumerate(keys)},
+        }
+        if module is not None:
+            attrs['__module__'] = module
+        if qualname is not None:
+            attrs['__qualname__'] = qualname
+        return type(name, (cls,), attrs)
+
+    def __getitem__(self, key):
+        return self._values[self._index[key]]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def asdict(self):
+        return dict(zip(self._keys, self._values))
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.asdict())
@@ -1,9 +1,18 @@
 import datetime
-import json
+import decimal
 import logging
+import uuid
 from collections import OrderedDict
-
-from .fields import BaseField, Field
+from functools import partial
+from types import MappingProxyType
+
+from .context import Context
+from .delta import (Fingerprint, canonical_json, fingerprint_patch,
+                    fingerprint_value, merge_patch)
+from .encoders import encoder_classes, get_encoder
+from .fields import BaseField, Field, SerializerField
+from .loaders import aload, load
+from .rows import Row
 from .utils import get_attribute_or_key
 
 __all__ = ['Serializer']
@@ -12,12 +21,41 @@ __all__ = ['Serializer']
 logger = logging.getLogger('cereal')
 
 
+# Python types of the values held by Django model fields, keyed by
+# Field.get_internal_type(). Columns of other types use generic dispatch.
+MODEL_FIELD_TYPES = {
+    'AutoField': int,
+    'BigAutoField': int,
+    'SmallAutoField': int,
+    'IntegerField': int,
+    'BigIntegerField': int,
+    'SmallIntegerField': int,
+    'PositiveIntegerField': int,
+    'PositiveBigIntegerField': int,
+    'PositiveSmallIntegerField': int,
+    'BooleanField': bool,
+    'NullBooleanField': bool,
+    'FloatField': float,
+    'CharField': str,
+    'TextField': str,
+    'SlugField': str,
+    'FilePathField': str,
+    'GenericIPAddressField': str,
+    'DecimalField': decimal.Decimal,
+    'UUIDField': uuid.UUID,
+    'DateField': datetime.date,
+    'DateTimeField': datetime.datetime,
+    'TimeField': datetime.time,
+}
+
+
 class SerializerMetaclass(type):
 
     def __new__(celf, name, bases, attrs):
         exclude_fields = attrs.pop('exclude', ())
         defined_fields = []
         model_fields = []
+        model_field_types = {}
         _meta = None
 
         for cls in bases:
@@ -28,6 +66,9 @@ class SerializerMetaclass(type):
                 for field in cls.model_fields:
                     if field not in exclude_fields:
                         model_fields.append(field)
+                        if field in cls.model_field_types:
+                            model_field_types[field] = \
+                                cls.model_field_types[field]
                 for field_name, field in cls.defined_fields.items():
                     if field_name not in exclude_fields:
                         defined_fields.append((field_name, field))
@@ -52,13 +93,29 @@ class SerializerMetaclass(type):
                             name not in defined_fields and \
                             name not in model_fields:
                         model_fields.append(name)
+                        python_type = MODEL_FIELD_TYPES.get(
+                            field.get_internal_type())
+                        if python_type is not None:
+                            model_field_types[name] = (
+                                python_type, field.null)
 
         attrs['exclude_fields'] = exclude_fields
         attrs['defined_fields'] = OrderedDict(defined_fields)
         attrs['model_fields'] = model_fields
+        attrs['model_field_types'] = model_field_types
 
         cls = super(
             SerializerMetaclass, celf).__new__(celf, name, bases, attrs)
+        cls.has_loaders = any(
+            isinstance(f, SerializerField) and
+            (f.loader is not None or f.serializer_class.has_loaders)
+            for f in cls.defined_fields.values())
+
+        row_keys = OrderedDict.fromkeys(
+            list(cls.defined_fields) + cls.model_fields)
+        cls.row_class = Row.for_keys(
+            '{}Row'.format(name), row_keys, module=cls.__module__,
+            qualname='{}.row_class'.format(cls.__qualname__))
         return cls
 
     @classmethod
@@ -66,31 +123,117 @@ class SerializerMetaclass(type):
         return OrderedDict()
 
 
+def datetime_handler(value):
+    return value.isoformat()
+
+
+def model_field_converter(python_type, null, convert, fallback):
+    """ Build the converter for a model column holding python_type values.
+        Values of any other type, such as those assigned to an unsaved
+        instance, are passed to fallback.
+    """
+
+    if convert is None:
+        def converter(value):
+            if type(value) is python_type:
+                return value
+            return fallback(value)
+    else:
+        def converter(value):
+            if type(value) is python_type:
+                return convert(value)
+            return fallback(value)
+
+    if null:
+        convert_value = converter
+
+        def converter(value):
+            if value is None:
+                return None
+            return convert_value(value)
+
+    return converter
+
+
 class BaseSerializer:
 
+    default_handlers = {
+        datetime.date: datetime_handler,
+        datetime.datetime: datetime_handler,
+        datetime.time: datetime_handler,
+    }
+
+    frozen = False
+
     def __init__(self, *args, **kwargs):
 
         super(BaseSerializer, self).__init__(*args, **kwargs)
 
-        def datetime_handler(value):
-            return value.isoformat()
-
-        self.handlers = {
-            datetime.date: datetime_handler,
-            datetime.datetime: datetime_handler,
-            datetime.time: datetime_handler,
+        self.handlers = dict(self.default_handlers)
+        self._handler_tables = {}
+        self._converters = {}
+        self._nested = {
+            name: field.serializer_class()
+            for name, field in self.defined_fields.items()
+            if isinstance(field, SerializerField)
         }
 
-    def _serialize_value(self, value):
-        handler = self.handlers.get(type(value))
+    def _cached(self, cache_name, key, context, build):
+        """ Return the table for key from the named cache, building it on a
+            miss. Frozen serializers can't add to their caches, so their
+            tables for encoders they weren't frozen with are kept on the
+            context for the rest of the call.
+        """
+        cache = getattr(self, cache_name)
+        table = cache.get(key)
+        if table is None and self.frozen and context is not None:
+            table = context.tables.get((self, cache_name))
+        if table is None:
+            table = build()
+            if not self.frozen:
+                cache[key] = table
+            elif context is not None:
+                context.tables[(self, cache_name)] = table
+        return table
+
+    def _handlers_for(self, encoder, context=None):
+        """ Return the handlers used with encoder: the encoder's handlers
+            replace the default handlers, while handlers registered with
+            add_handler take precedence over both. Computed once per
+            encoder type.
+        """
+        if encoder is None or not encoder.handlers:
+            return self.handlers
+
+        def build():
+            handlers = dict(self.handlers)
+            for _type, handler in encoder.handlers.items():
+                if handlers.get(_type) is self.default_handlers.get(_type):
+                    handlers[_type] = handler
+            return handlers
+
+        return self._cached(
+            '_handler_tables', type(encoder), context, build)
+
+    def _serialize_value(self, value, encoder=None, handlers=None):
+        if handlers is None:
+            handlers = self._handlers_for(encoder)
+        handler = handlers.get(type(value))
         if handler:
             return handler(value)
         elif value is None or isinstance(value, (bool, float, int, str)):
             return value
         elif isinstance(value, dict):
-            return {k: self._serialize_value(v) for k, v in value.items()}
-        elif isinstance(value, (list, tuple, set)):
-            return list(self._serialize_value(v) for v in value)
+            return {k: self._serialize_value(v, encoder, handlers)
+                    for k, v in value.items()}
+        elif isinstance(value, (list, tuple)):
+            return list(self._serialize_value(v, encoder, handlers)
+                        for v in value)
+        elif isinstance(value, (set, frozenset)):
+            # sets have no order of their own, sort them so the output
+            # and its fingerprint don't depend on the hash seed
+            return sorted((self._serialize_value(v, encoder, handlers)
+                           for v in value), key=canonical_json)
         else:
             return '{}'.format(value)
 
@@ -98,68 +241,307 @@ class BaseSerializer:
         return 'serialize_{}'.format(name)
 
     def add_handler(self, _type, handler):
+        """ Register a handler for values of _type, on this serializer and
+            on the serializers of its SerializerFields.
+        """
+        if self.frozen:
+            raise RuntimeError('cannot add a handler to a frozen serializer')
         if not callable(handler):
             raise ValueError('handler must be callable')
         self.handlers[_type] = handler
+        self._handler_tables = {}
+        self._converters = {}
+        for nested in self._nested.values():
+            nested.add_handler(_type, handler)
+
+    def freeze(self):
+        """ Make the serializer immutable so that a single instance can be
+            shared between threads. Handlers can no longer be added, to this
+            serializer or to the serializers of its SerializerFields, which
+            belong to this instance only. The model field converters are
+            built for every registered encoder. Returns the serializer.
+        """
+        if not self.frozen:
+            for encoder_class in encoder_classes():
+                try:
+                    encoder = encoder_class()
+                except ImportError:
+                    continue
+                self._handlers_for(encoder)
+                self._model_converters(encoder)
+            self._model_converters(None)
+            self._handler_tables = MappingProxyType(self._handler_tables)
+            self._converters = MappingProxyType(self._converters)
+            self.handlers = MappingProxyType(self.handlers)
+            self.frozen = True
+            for nested in self._nested.values():
+                nested.freeze()
+        return self
+
+    def _fields(self):
+        """ Yield (name, field) pairs in output order. Model fields,
+            which have no field instance, are yielded with None.
+        """
+        yield from self.defined_fields.items()
+        for name in self.model_fields:
+            yield name, None
 
-    def asdict_(self, obj):
+    def _field_value(self, obj, name, field, context):
 
-        data = {}
+        encoder = context.encoder
+        handlers = self._handlers_for(encoder, context)
+        method_name = self._serializer_method(name)
 
-        for name, field in self.defined_fields.items():
-            """ Resolution order:
+        if field is None:
+            """ Resolution order for model fields:
                 1. serializer serialize_NAME() method
-                2. field value() method
-                3. object attribute / dict value
+                2. object attribute
             """
-            method_name = self._serializer_method(name)
             value = None
 
             if hasattr(self, method_name):
                 value = getattr(self, method_name)(obj)
-            elif hasattr(field, 'value'):
-                value = getattr(field, 'value')(obj, name)
-            else:
-                if hasattr(field, 'from_attr'):
-                    attr_name = field.from_attr or name
-                value = get_attribute_or_key(obj, attr_name)
+            elif hasattr(obj, name):
+                value = get_attribute_or_key(obj, name)
 
-            data[name] = self._serialize_value(value)
+            return self._serialize_value(value, encoder, handlers)
+
+        """ Resolution order:
+            1. serializer serialize_NAME() method
+            2. field value() method
+            3. object attribute / dict value
+        """
+        value = None
+
+        if hasattr(self, method_name):
+            value = getattr(self, method_name)(obj)
+        elif isinstance(field, SerializerField):
+            # already serialized by the nested serializer
+            return field.value(
+                obj, name, context=context, serializer=self._nested[name])
+        elif hasattr(field, 'value'):
+            value = getattr(field, 'value')(obj, name)
+        else:
+            if hasattr(field, 'from_attr'):
+                attr_name = field.from_attr or name
+            value = get_attribute_or_key(obj, attr_name)
 
-        for name in self.model_fields:
-            """ Resolution order:
-                1. serializer serialize_NAME() method
-                2. object attribute
-            """
+        return self._serialize_value(value, encoder, handlers)
 
-            method_name = self._serializer_method(name)
-            value = None
+    def _model_converter(self, name, encoder, handlers):
+        if hasattr(self, self._serializer_method(name)):
+            return None
 
-            if hasattr(self, method_name):
-                value = getattr(self, method_name)(obj)
-            elif hasattr(obj, name):
-                value = get_attribute_or_key(obj, name)
+        fallback = partial(
+            self._serialize_value, encoder=encoder, handlers=handlers)
+        if name not in self.model_field_types:
+            return fallback
 
-            data[name] = self._serialize_value(value)
+        python_type, null = self.model_field_types[name]
+        handler = handlers.get(python_type)
+        if handler is None and python_type in (decimal.Decimal, uuid.UUID):
+            handler = str
 
-        return data
+        return model_field_converter(python_type, null, handler, fallback)
+
+    def _model_converters(self, encoder, context=None):
+        """ Return (name, converter) pairs for the model fields, computed
+            once per encoder type from the model field types. The converter
+            is None for fields that have a serialize_NAME() method.
+        """
+
+        def build():
+            handlers = self._handlers_for(encoder, context)
+            return [(name, self._model_converter(name, encoder, handlers))
+                    for name in self.model_fields]
+
+        return self._cached('_converters', type(encoder), context, build)
+
+    def asdict_(self, obj, context=None):
+
+        if context is None:
+            context = Context()
+
+        data = {}
+
+        for name, field in self.defined_fields.items():
+            data[name] = self._field_value(obj, name, field, context)
 
-    def serialize(self, obj, raw=False):
+        if isinstance(obj, dict):
+            for name in self.model_fields:
+                data[name] = self._field_value(obj, name, None, context)
+            return data
 
+        for name, convert in self._model_converters(context.encoder, context):
+            if convert is None:
+                data[name] = self._field_value(obj, name, None, context)
+            else:
+                data[name] = convert(getattr(obj, name, None))
+
+        return data
+
+    def _prefetch_fields(self, objs):
+        """ Yield (field, nested, children) for each SerializerField that
+            has a loader somewhere below it, nested being this instance's
+            serializer for the field. children are the keys to load when
+            the field has a loader, otherwise the nested objects.
+        """
+        for name, field in self.defined_fields.items():
+            if not isinstance(field, SerializerField) or \
+                    hasattr(self, self._serializer_method(name)):
+                continue
+            nested = self._nested[name]
+            if field.loader is None and not nested.has_loaders:
+                continue
+
+            children = []
+            attr_name = name if field.loader is None else field.key
+            for obj in objs:
+                value = get_attribute_or_key(obj, attr_name)
+                if isinstance(value, (list, tuple, set)):
+                    children.extend(value)
+                elif value is not None and not hasattr(value, 'objects'):
+                    children.append(value)
+
+            yield field, nested, children
+
+    def prefetch_(self, objs, context):
+        """ Resolve the loaders of the SerializerFields of this serializer
+            and its nested serializers for all of objs, with at most one
+            call per field at each level of nesting. The results are kept
+            in the context for asdict_ to use.
+        """
+        for field, nested, children in self._prefetch_fields(objs):
+            if field.loader is not None:
+                children = [v for v in load(field.loader, children, context)
+                            if v is not None]
+            if children and nested.has_loaders:
+                nested.prefetch_(children, context)
+
+    async def aprefetch_(self, objs, context):
+        """ Like prefetch_, but awaits loaders whose load_many is a
+            coroutine instead of running them in a new event loop.
+        """
+        for field, nested, children in self._prefetch_fields(objs):
+            if field.loader is not None:
+                values = await aload(field.loader, children, context)
+                children = [v for v in values if v is not None]
+            if children and nested.has_loaders:
+                await nested.aprefetch_(children, context)
+
+    def row_(self, obj, context=None):
+        """ Like asdict_, but return a compact Row sharing its keys with
+            every other row of this serializer.
+        """
+        return self.row_class(tuple(self.asdict_(obj, context).values()))
+
+    def delta_(self, obj, previous, context=None, removed=None):
+        """ Return (patch, state) where patch is a JSON Merge Patch of the
+            fields that changed since previous.
+
+            A field whose new value is None appears as None in the patch,
+            which is also how a merge patch removes a key. Consumers that
+            apply the patch as RFC 7396 drop such fields, although asdict_
+            output always contains them. Pass removed, for example a marker
+            string, to send that value for removed keys instead so that
+            None always means null.
+
+            previous is either the dict returned by asdict_ for an earlier
+            version of obj, in which case state is the new dict, or a
+            Fingerprint, in which case state is the new Fingerprint. With a
+            Fingerprint, serialize_NAME() methods decorated with depends_on
+            are only called when one of their source attributes changed.
+        """
+
+        if context is None:
+            context = Context()
+
+        if not isinstance(previous, Fingerprint):
+            current = self.asdict_(obj, context)
+            return merge_patch(previous, current, removed), current
+
+        patch = {}
+        fingerprint = Fingerprint()
+
+        for name, field in self._fields():
+            method = getattr(self, self._serializer_method(name), None)
+            attrs = getattr(method, 'depends_on', None)
+
+            if attrs is not None:
+                digest = fingerprint_value([
+                    self._serialize_value(get_attribute_or_key(obj, a))
+                    for a in attrs
+                ])
+                fingerprint[name] = digest
+                if previous.get(name) != digest:
+                    patch[name] = self._field_value(
+                        obj, name, field, context)
+                continue
+
+            value = self._field_value(obj, name, field, context)
+            fingerprint[name] = fingerprint_value(value)
+            changed, field_patch = fingerprint_patch(
+                previous.get(name), fingerprint[name], value, removed)
+            if changed:
+                patch[name] = field_patch
+
+        for name in previous:
+            if name not in fingerprint:
+                patch[name] = removed
+
+        return patch, fingerprint
+
+    def fingerprint_(self, obj, context=None):
+        """ Return the Fingerprint of obj to be passed to a later delta_.
+        """
+        return self.delta_(obj, Fingerprint(), context)[1]
+
+    def _serialize(self, obj, raw, compact, context):
+
+        convert = self.row_ if compact else self.asdict_
         data = None
 
         if isinstance(obj, (list, tuple)):
             data = []
             for o in obj:
-                data.append(self.asdict_(o))
+                data.append(convert(o, context))
         else:
-            data = self.asdict_(obj)
+            data = convert(obj, context)
 
         if not raw:
-            data = json.dumps(data)
+            data = context.encoder.encode(data)
 
         return data
 
+    def serialize(self, obj, raw=False, format='json', compact=False):
+        """ Serialize an object or a list of objects. `format` is the name
+            of a registered encoder (json, msgpack, cbor) or an Encoder
+            instance. When raw is True the unencoded data is returned,
+            with values prepared for the chosen format. When compact is
+            True objects are converted to Rows instead of dicts.
+        """
+
+        context = Context(get_encoder(format))
+
+        if self.has_loaders:
+            self.prefetch_(obj if isinstance(obj, (list, tuple)) else [obj],
+                           context)
+
+        return self._serialize(obj, raw, compact, context)
+
+    async def aserialize(self, obj, raw=False, format='json', compact=False):
+        """ Like serialize, for use in async code. Async loaders are
+            awaited in the running event loop.
+        """
+
+        context = Context(get_encoder(format))
+
+        if self.has_loaders:
+            await self.aprefetch_(
+                obj if isinstance(obj, (list, tuple)) else [obj], context)
+
+        return self._serialize(obj, raw, compact, context)
+
 
 class Serializer(BaseSerializer, metaclass=SerializerMetaclass):
     pass
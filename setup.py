@@ -1,12 +1,16 @@
-from setuptools import setup
+from setuptools import find_packages, setup
 
 long_description = open('README.md').read()
 
 setup(
     name="pycereal",
     version='1.1',
-    packages=["cereal"],
+    packages=find_packages(include=["cereal", "cereal.*"]),
     include_package_data=True,
+    extras_require={
+        "msgpack": ["msgpack"],
+        "cbor": ["cbor2"],
+    },
     description="A simple object and Django model JSON serializer",
     url="https://github.com/istrategylabs/cereal",
     author="Jeremy Carbaugh",
@@ -0,0 +1,131 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cereal
+
+
+class ClassyClass():
+    def __init__(self, *args, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class AuthorSerializer(cereal.Serializer):
+    name = cereal.Field()
+    email = cereal.Field()
+
+
+class ArticleSerializer(cereal.Serializer):
+    title = cereal.Field()
+    tags = cereal.Field()
+    author = cereal.SerializerField(AuthorSerializer)
+    summary = cereal.Field()
+
+    calls = 0
+
+    @cereal.depends_on('title', 'tags')
+    def serialize_summary(self, obj):
+        self.calls += 1
+        return '{} ({})'.format(obj.title, ', '.join(obj.tags))
+
+
+@pytest.fixture
+def article():
+    return ClassyClass(
+        title='A Title',
+        tags=['a', 'b'],
+        author=ClassyClass(name='Corey', email='corey@example.com'),
+    )
+
+
+def test_merge_patch():
+    previous = {'a': 1, 'b': {'c': 2, 'd': 3}, 'e': [1], 'f': 0}
+    current = {'a': 1, 'b': {'c': 2, 'd': 4}, 'e': [1, 2], 'g': 5}
+    assert cereal.merge_patch(previous, current) == {
+        'b': {'d': 4}, 'e': [1, 2], 'f': None, 'g': 5}
+
+
+def test_merge_patch_removed_marker():
+    previous = {'a': 1, 'b': {'c': 2, 'd': 3}}
+    current = {'a': None, 'b': {'c': 2}}
+    assert cereal.merge_patch(previous, current, '$removed') == {
+        'a': None, 'b': {'d': '$removed'}}
+
+
+@pytest.mark.parametrize('fingerprint', [False, True])
+def test_delta_set_to_null(article, fingerprint):
+    ser = ArticleSerializer()
+    article.tags = {'a': 1, 'b': 2}
+    previous = ser.fingerprint_(article) if fingerprint \
+        else ser.asdict_(article)
+
+    article.tags = {'a': None}
+    article.author.email = None
+    patch, _ = ser.delta_(article, previous, removed='$removed')
+    assert patch['tags'] == {'a': None, 'b': '$removed'}
+    assert patch['author'] == {'email': None}
+
+
+def test_delta_from_snapshot(article):
+    ser = ArticleSerializer()
+    snapshot = ser.asdict_(article)
+
+    article.author.email = 'spaceman@example.com'
+    patch, snapshot = ser.delta_(article, snapshot)
+    assert patch == {'author': {'email': 'spaceman@example.com'}}
+    assert snapshot == ser.asdict_(article)
+
+    patch, snapshot = ser.delta_(article, snapshot)
+    assert patch == {}
+
+
+def test_delta_from_fingerprint(article):
+    ser = ArticleSerializer()
+    fingerprint = ser.fingerprint_(article)
+    assert ser.calls == 1
+
+    article.author.name = 'Scarlett'
+    patch, fingerprint = ser.delta_(article, fingerprint)
+    assert patch == {'author': {'name': 'Scarlett'}}
+    assert ser.calls == 1
+
+    article.tags = ['c']
+    patch, fingerprint = ser.delta_(article, fingerprint)
+    assert patch == {'tags': ['c'], 'summary': 'A Title (c)'}
+    assert ser.calls == 2
+
+
+def test_fingerprint_roundtrip(article):
+    ser = ArticleSerializer()
+    stored = json.dumps(ser.fingerprint_(article))
+
+    article.title = 'Another Title'
+    patch, _ = ser.delta_(article, cereal.Fingerprint(json.loads(stored)))
+    assert patch == {'title': 'Another Title',
+                     'summary': 'Another Title (a, b)'}
+
+
+def test_set_serialized_sorted(article):
+    article.tags = {'b', 'c', 'a'}
+    assert ArticleSerializer().asdict_(article)['tags'] == ['a', 'b', 'c']
+
+
+def test_fingerprint_stable_across_hash_seeds():
+    script = (
+        'import json, cereal\n'
+        'from tests.test_delta import ArticleSerializer, ClassyClass\n'
+        'article = ClassyClass(title="t", tags={"x", "y", "z", "w"},\n'
+        '                      author={"name": "n", "email": "e"})\n'
+        'print(json.dumps(ArticleSerializer().fingerprint_(article)))\n'
+    )
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='tests.testapp.settings')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fingerprints = set()
+    for seed in ('1', '2', '3'):
+        env['PYTHONHASHSEED'] = seed
+        fingerprints.add(subprocess.check_output(
+            [sys.executable, '-c', script], env=env, cwd=root))
+    assert len(fingerprints) == 1
@@ -0,0 +1,124 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import pytest
+
+import cereal
+
+
+class ValueClass():
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class InnerSerializer(cereal.Serializer):
+    created = cereal.Field()
+
+
+class EventSerializer(cereal.Serializer):
+    id = cereal.Field()
+    created = cereal.Field()
+    payload = cereal.Field()
+    child = cereal.SerializerField(InnerSerializer)
+
+
+@pytest.fixture
+def event():
+    return ValueClass(
+        id=1,
+        created=datetime.datetime(2018, 3, 8, 11, 57, 23,
+                                  tzinfo=datetime.timezone.utc),
+        payload=b'\x00\x01',
+        child=ValueClass(created=datetime.datetime(
+            2019, 1, 1, tzinfo=datetime.timezone.utc)),
+    )
+
+
+def test_json_default(event):
+    event.payload = None
+    data = json.loads(EventSerializer().serialize(event))
+    assert data['created'] == event.created.isoformat()
+    assert data['child']['created'] == event.child.created.isoformat()
+
+
+def test_unknown_format(event):
+    with pytest.raises(ValueError):
+        EventSerializer().serialize(event, format='yaml')
+
+
+def test_msgpack(event):
+    msgpack = pytest.importorskip('msgpack')
+    packed = EventSerializer().serialize(event, format='msgpack')
+    data = msgpack.unpackb(packed, timestamp=3)
+    assert data['id'] == 1
+    assert data['created'] == event.created
+    assert data['payload'] == event.payload
+    assert data['child']['created'] == event.child.created
+
+
+def test_msgpack_raw_keeps_native_values(event):
+    msgpack = pytest.importorskip('msgpack')
+    data = EventSerializer().serialize(event, raw=True, format='msgpack')
+    assert data['created'] is event.created
+    assert data['child']['created'] is event.child.created
+    assert isinstance(msgpack.unpackb(msgpack.packb(data, datetime=True))[
+        'created'], msgpack.Timestamp)
+
+
+def test_added_handler_overrides_encoder(event):
+    msgpack = pytest.importorskip('msgpack')
+    ser = EventSerializer()
+    ser.add_handler(datetime.datetime, lambda v: v.year)
+    data = msgpack.unpackb(ser.serialize(event, format='msgpack'))
+    assert data['created'] == 2018
+    assert data['child']['created'] == 2019
+
+
+@pytest.mark.parametrize('format', ['msgpack', 'cbor'])
+def test_naive_datetime(event, format):
+    module = pytest.importorskip({'msgpack': 'msgpack', 'cbor': 'cbor2'}[
+        format])
+    event.created = event.created.replace(tzinfo=None)
+    ser = EventSerializer()
+    with pytest.raises(Exception, match='naive datetime'):
+        ser.serialize(event, format=format)
+
+    tz = datetime.timezone(datetime.timedelta(hours=-5))
+    encoder_class = {'msgpack': cereal.MessagePackEncoder,
+                     'cbor': cereal.CBOREncoder}[format]
+    encoder = encoder_class(timezone=tz)
+    packed = ser.serialize(event, format=encoder)
+    if format == 'msgpack':
+        data = module.unpackb(packed, timestamp=3)
+    else:
+        data = module.loads(packed)
+    assert data['created'] == event.created.replace(tzinfo=tz)
+
+
+def test_cbor(event):
+    cbor2 = pytest.importorskip('cbor2')
+    event.payload = [decimal.Decimal('1.5'), uuid.UUID(int=1)]
+    data = cbor2.loads(EventSerializer().serialize(event, format='cbor'))
+    assert data['created'] == event.created
+    assert data['payload'] == [decimal.Decimal('1.5'), uuid.UUID(int=1)]
+    assert data['child']['created'] == event.child.created
+
+
+def test_custom_encoder(event):
+
+    class KeysEncoder(cereal.Encoder):
+        handlers = {datetime.datetime: lambda v: v.year}
+
+        def encode(self, data):
+            return sorted(data)
+
+    ser = EventSerializer()
+    assert ser.serialize(event, format=KeysEncoder()) == \
+        ['child', 'created', 'id', 'payload']
+
+    cereal.register_encoder('years', KeysEncoder)
+    data = ser.serialize(event, raw=True, format='years')
+    assert data['created'] == 2018
+    assert data['child']['created'] == 2019
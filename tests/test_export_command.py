@@ -0,0 +1,207 @@
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+import cereal
+from .testapp.models import Post
+
+
+class PostSerializer(cereal.Serializer):
+    exclude = ('created',)
+
+    class Meta:
+        model = Post
+
+
+SERIALIZER = 'tests.test_export_command.PostSerializer'
+
+
+class LengthLoader(cereal.Loader):
+    calls = []
+
+    def load_many(self, keys):
+        self.calls.append(keys)
+        return {k: {'length': len(k)} for k in keys}
+
+
+class LengthSerializer(cereal.Serializer):
+    length = cereal.Field()
+
+
+class LoadedPostSerializer(PostSerializer):
+    title_info = cereal.SerializerField(
+        LengthSerializer, loader=LengthLoader(), key='title')
+
+
+@pytest.fixture
+def posts(db):
+    return [Post.objects.create(title='Post {}'.format(i), content='')
+            for i in range(10)]
+
+
+def read_shards(path, pattern, opener=open):
+    rows = []
+    for shard in sorted(path.glob(pattern)):
+        with opener(shard, 'rt') as f:
+            if shard.name.endswith(('.ndjson', '.ndjson.gz')):
+                rows.extend(json.loads(line) for line in f)
+            else:
+                rows.extend(json.load(f))
+    return rows
+
+
+def test_export_json(posts, tmp_path):
+    call_command('cereal_export', SERIALIZER, output_dir=str(tmp_path),
+                 workers=1, shards=3, batch_size=2, stdout=io.StringIO())
+    rows = read_shards(tmp_path, 'testapp_post-*.json')
+    assert [r['id'] for r in rows] == [p.id for p in posts]
+
+
+def test_export_ndjson_gzip_filtered(posts, tmp_path):
+    call_command('cereal_export', SERIALIZER, '--filter', 'title=Post 3',
+                 '--format', 'ndjson', '--gzip',
+                 output_dir=str(tmp_path), workers=1,
+                 stdout=io.StringIO())
+    rows = read_shards(
+        tmp_path, 'testapp_post-*.ndjson.gz', opener=gzip.open)
+    assert rows == [{'id': posts[3].id, 'title': 'Post 3', 'content': ''}]
+
+
+def test_export_resumes_from_checkpoint(posts, tmp_path, mocker):
+    from cereal.management.commands import cereal_export
+
+    export_shard = cereal_export.export_shard
+    calls = []
+
+    def failing_export_shard(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError('boom')
+        return export_shard(*args)
+
+    mocker.patch.object(cereal_export, 'export_shard', failing_export_shard)
+    with pytest.raises(CommandError, match='shard 1 failed: boom'):
+        call_command('cereal_export', SERIALIZER, output_dir=str(tmp_path),
+                     workers=1, shards=2, stdout=io.StringIO())
+
+    checkpoint = json.loads(
+        (tmp_path / 'testapp_post.checkpoint.json').read_text())
+    assert checkpoint['done'] == [0]
+
+    calls.clear()
+    call_command('cereal_export', SERIALIZER, output_dir=str(tmp_path),
+                 workers=1, stdout=io.StringIO())
+    assert len(calls) == 1
+    rows = read_shards(tmp_path, 'testapp_post-*.json')
+    assert len(rows) == len(posts)
+
+
+def test_export_records_finished_shards_on_failure(posts, tmp_path,
+                                                  mocker):
+    from concurrent.futures import ThreadPoolExecutor
+    from cereal.management.commands import cereal_export
+
+    def export_shard(*args):
+        if args[4].endswith('-0001.json'):
+            raise RuntimeError('boom')
+        return os.getpid(), 0, 0.0
+
+    mocker.patch.object(cereal_export, 'export_shard', export_shard)
+    mocker.patch.object(
+        cereal_export, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    with pytest.raises(CommandError, match='shard 1 failed: boom'):
+        call_command('cereal_export', SERIALIZER, output_dir=str(tmp_path),
+                     workers=2, shards=2, stdout=io.StringIO())
+
+    checkpoint = json.loads(
+        (tmp_path / 'testapp_post.checkpoint.json').read_text())
+    assert checkpoint['done'] == [0]
+
+
+def test_export_requires_model_serializer(db, tmp_path):
+    with pytest.raises(CommandError):
+        call_command('cereal_export', 'cereal.Serializer',
+                     output_dir=str(tmp_path))
+
+
+def test_export_removes_checkpoint_when_complete(posts, tmp_path):
+    call_command('cereal_export', SERIALIZER, output_dir=str(tmp_path),
+                 workers=1, shards=2, stdout=io.StringIO())
+    assert not (tmp_path / 'testapp_post.checkpoint.json').exists()
+
+    Post.objects.create(title='Post 10', content='')
+    call_command('cereal_export', SERIALIZER, output_dir=str(tmp_path),
+                 workers=1, shards=2, stdout=io.StringIO())
+    rows = read_shards(tmp_path, 'testapp_post-*.json')
+    assert len(rows) == len(posts) + 1
+
+
+def test_export_rejects_mismatched_checkpoint(posts, tmp_path):
+    checkpoint = tmp_path / 'testapp_post.checkpoint.json'
+    checkpoint.write_text(json.dumps({
+        'serializer': SERIALIZER, 'filters': {}, 'format': 'json',
+        'gzip': False, 'shard_count': 2, 'shards': [[0, 5], [5, 10]],
+        'done': [0],
+    }))
+    with pytest.raises(CommandError):
+        call_command('cereal_export', SERIALIZER, '--format', 'ndjson',
+                     '--gzip', output_dir=str(tmp_path), workers=1)
+    with pytest.raises(CommandError):
+        call_command('cereal_export', SERIALIZER, output_dir=str(tmp_path),
+                     workers=1, shards=3)
+
+
+@pytest.mark.parametrize('option', ['shards', 'workers', 'batch_size'])
+def test_export_rejects_invalid_counts(db, tmp_path, option):
+    with pytest.raises(CommandError):
+        call_command('cereal_export', SERIALIZER, output_dir=str(tmp_path),
+                     **{option: -1})
+
+
+def test_export_parallel_workers(tmp_path):
+    # worker processes can't see an in-memory database, so this export
+    # runs in a subprocess against a SQLite file
+    script = textwrap.dedent("""
+        import sys
+        import django
+        django.setup()
+        from django.core.management import call_command
+        from tests.testapp.models import Post
+        call_command('migrate', run_syncdb=True, skip_checks=True,
+                     verbosity=0)
+        Post.objects.bulk_create(
+            [Post(title=str(i), content='') for i in range(100)])
+        call_command('cereal_export', sys.argv[1], output_dir=sys.argv[2],
+                     workers=3, shards=5, batch_size=7)
+    """)
+    env = dict(os.environ,
+               DJANGO_SETTINGS_MODULE='tests.testapp.settings_file',
+               CEREAL_TEST_DB=str(tmp_path / 'db.sqlite3'))
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-c', script, SERIALIZER, str(tmp_path / 'out')],
+        cwd=root, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+    assert result.stdout.count('rows/sec') == 5
+    rows = read_shards(tmp_path / 'out', 'testapp_post-*.json')
+    assert sorted(r['id'] for r in rows) == list(range(1, 101))
+
+
+def test_export_prefetches_each_batch(posts, tmp_path):
+    LengthLoader.calls.clear()
+    call_command('cereal_export',
+                 'tests.test_export_command.LoadedPostSerializer',
+                 output_dir=str(tmp_path), workers=1, shards=1,
+                 batch_size=4, stdout=io.StringIO())
+    assert [len(keys) for keys in LengthLoader.calls] == [4, 4, 2]
+    rows = read_shards(tmp_path, 'testapp_post-*.json')
+    assert rows[0]['title_info'] == {'length': len('Post 0')}
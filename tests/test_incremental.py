@@ -0,0 +1,111 @@
+import datetime
+
+import pytest
+
+import cereal
+from cereal.incremental import (DatabaseCheckpointStore, FileCheckpointStore,
+                                export_changes)
+from .testapp.models import Post
+
+
+class PostSerializer(cereal.Serializer):
+    exclude = ('content', 'created')
+
+    class Meta:
+        model = Post
+
+
+START = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def create_post(title, days):
+    post = Post.objects.create(title=title, content='')
+    Post.objects.filter(pk=post.pk).update(
+        created=START + datetime.timedelta(days=days))
+    return post
+
+
+@pytest.fixture(params=['file', 'db'])
+def store(request, db, tmp_path):
+    if request.param == 'file':
+        return FileCheckpointStore(str(tmp_path / 'checkpoints.json'))
+    return DatabaseCheckpointStore()
+
+
+def titles(rows):
+    return [row['title'] for row in rows]
+
+
+def test_export_changes(store):
+    create_post('a', 0)
+    create_post('b', 1)
+    create_post('c', 1)
+
+    rows = export_changes(PostSerializer(), 'created', store, batch_size=2)
+    assert titles(rows) == ['a', 'b', 'c']
+    assert titles(export_changes(PostSerializer(), 'created', store)) == []
+
+    create_post('d', 1)
+    create_post('e', 2)
+    rows = export_changes(PostSerializer(), 'created', store)
+    assert titles(rows) == ['d', 'e']
+
+
+def test_checkpoint_advances_on_completion(store):
+    create_post('a', 0)
+    create_post('b', 1)
+
+    rows = export_changes(PostSerializer(), 'created', store, batch_size=1)
+    assert next(rows)['title'] == 'a'
+    rows.close()
+
+    rows = export_changes(PostSerializer(), 'created', store)
+    assert titles(rows) == ['a', 'b']
+
+
+def test_tombstones(store):
+    create_post('a', 0)
+    seen = []
+
+    def tombstones(since):
+        seen.append(since)
+        return [42]
+
+    rows = list(export_changes(PostSerializer(), 'created', store,
+                               tombstones=tombstones))
+    assert rows[-1] == {'pk': 42, 'deleted': True}
+
+    create_post('b', 1)
+    list(export_changes(PostSerializer(), 'created', store,
+                        tombstones=tombstones))
+    assert seen[0] is None
+    assert seen[1] == START
+
+
+def test_lag_rereads_window(store):
+    lag = datetime.timedelta(days=1)
+    create_post('a', 0)
+    b = create_post('b', 1)
+    rows = export_changes(PostSerializer(), 'created', store, lag=lag)
+    assert titles(rows) == ['a', 'b']
+
+    # committed after b was exported, with an older watermark
+    create_post('late', 0.5)
+    create_post('c', 2)
+    rows = export_changes(PostSerializer(), 'created', store, lag=lag,
+                          batch_size=1)
+    assert titles(rows) == ['late', 'c']
+    assert titles(export_changes(
+        PostSerializer(), 'created', store, lag=lag)) == []
+
+    Post.objects.filter(pk=b.pk).update(
+        created=START + datetime.timedelta(days=1.5))
+    rows = export_changes(PostSerializer(), 'created', store, lag=lag)
+    assert titles(rows) == ['b']
+
+
+def test_late_row_missed_without_lag(store):
+    create_post('a', 1)
+    list(export_changes(PostSerializer(), 'created', store))
+    create_post('late', 0.5)
+    assert titles(export_changes(PostSerializer(), 'created', store)) == []
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+import cereal
+
+
+class ClassyClass():
+    def __init__(self, *args, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class DictLoader(cereal.Loader):
+
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    def load_many(self, keys):
+        self.calls.append(keys)
+        return {k: self.data[k] for k in keys if k in self.data}
+
+
+class AsyncDictLoader(DictLoader):
+
+    async def load_many(self, keys):
+        return super().load_many(keys)
+
+
+COUNTRIES = DictLoader({
+    'us': {'name': 'United States'},
+    'fr': {'name': 'France'},
+})
+
+USERS = DictLoader({
+    1: {'name': 'Corey', 'country_id': 'us'},
+    2: {'name': 'Scarlett', 'country_id': 'fr'},
+})
+
+
+class CountrySerializer(cereal.Serializer):
+    name = cereal.Field()
+
+
+class UserSerializer(cereal.Serializer):
+    name = cereal.Field()
+    country = cereal.SerializerField(
+        CountrySerializer, loader=COUNTRIES, key='country_id')
+
+
+class ArticleSerializer(cereal.Serializer):
+    title = cereal.Field()
+    author = cereal.SerializerField(
+        UserSerializer, loader=USERS, key='author_id')
+    editors = cereal.SerializerField(
+        UserSerializer, loader=USERS, key='editor_ids')
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    USERS.calls.clear()
+    COUNTRIES.calls.clear()
+
+
+def test_batched_loading():
+    articles = [
+        ClassyClass(title='a', author_id=1, editor_ids=[2]),
+        ClassyClass(title='b', author_id=2, editor_ids=[1, 2, 3]),
+        ClassyClass(title='c', author_id=None, editor_ids=[]),
+    ]
+    data = ArticleSerializer().serialize(articles, raw=True)
+
+    assert USERS.calls == [[1, 2], [3]]
+    assert COUNTRIES.calls == [['us', 'fr']]
+
+    assert data[0]['author'] == {
+        'name': 'Corey', 'country': {'name': 'United States'}}
+    assert data[1]['editors'][0]['name'] == 'Corey'
+    assert data[1]['editors'][2] is None
+    assert data[2]['author'] is None
+
+
+def test_loading_without_prefetch():
+    obj = ClassyClass(title='a', author_id=2, editor_ids=[])
+    data = ArticleSerializer().asdict_(obj)
+    assert data['author']['country'] == {'name': 'France'}
+    assert USERS.calls == [[2]]
+
+
+def test_async_loader():
+    loader = AsyncDictLoader({1: {'name': 'Corey'}})
+
+    class PostSerializer(cereal.Serializer):
+        author = cereal.SerializerField(
+            CountrySerializer, loader=loader, key='author_id')
+
+    data = PostSerializer().serialize(
+        [{'author_id': 1}, {'author_id': 1}], raw=True)
+    assert data == [{'author': {'name': 'Corey'}}] * 2
+    assert loader.calls == [[1]]
+
+
+def test_loader_requires_key():
+    with pytest.raises(ValueError):
+        cereal.SerializerField(CountrySerializer, loader=COUNTRIES)
+
+
+def test_has_loaders():
+    assert ArticleSerializer.has_loaders
+    assert UserSerializer.has_loaders
+    assert not CountrySerializer.has_loaders
+
+
+def test_async_loader_in_running_loop():
+    loader = AsyncDictLoader({1: {'name': 'Corey'}})
+
+    class PostSerializer(cereal.Serializer):
+        author = cereal.SerializerField(
+            CountrySerializer, loader=loader, key='author_id')
+
+    async def serialize():
+        with pytest.raises(RuntimeError, match='aserialize'):
+            PostSerializer().serialize([{'author_id': 1}], raw=True)
+        return await PostSerializer().aserialize(
+            [{'author_id': 1}, {'author_id': 2}], raw=True)
+
+    data = asyncio.run(serialize())
+    assert data == [{'author': {'name': 'Corey'}}, {'author': None}]
+    assert loader.calls == [[1, 2]]
+
+
+def test_sync_loader_in_running_loop():
+
+    async def serialize():
+        return ArticleSerializer().serialize(
+            [ClassyClass(title='a', author_id=1, editor_ids=[])], raw=True)
+
+    data = asyncio.run(serialize())
+    assert data[0]['author']['name'] == 'Corey'
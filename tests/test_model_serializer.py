@@ -1,10 +1,12 @@
 import datetime
+import decimal
 import logging
+import uuid
 
 import pytest
 
 import cereal
-from .testapp.models import Post
+from .testapp.models import Post, Reading
 
 
 logger = logging.getLogger('cereal.tests')
@@ -74,3 +76,58 @@ def test_inheritance_exclude_from_parent(post):
 def test_inheritance_Meta_from_parent(post):
     data = ClonedPostSerializer().asdict_(post)
     assert 'A TITLE' == data['title']
+
+
+class ReadingSerializer(cereal.Serializer):
+
+    class Meta:
+        model = Reading
+
+
+@pytest.fixture
+def reading():
+    return Reading(
+        id=1,
+        uuid=uuid.UUID(int=1),
+        value=decimal.Decimal('1.50'),
+        count=3,
+        label='temperature',
+        taken=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+
+
+def test_model_field_types():
+    assert ReadingSerializer.model_field_types['value'] == \
+        (decimal.Decimal, False)
+    assert ReadingSerializer.model_field_types['taken'] == \
+        (datetime.datetime, True)
+
+
+def test_model_field_converters(reading):
+    data = ReadingSerializer().asdict_(reading)
+    assert data == {
+        'id': 1,
+        'uuid': str(reading.uuid),
+        'value': '1.50',
+        'count': 3,
+        'label': 'temperature',
+        'taken': reading.taken.isoformat(),
+    }
+
+
+def test_model_field_converter_fallback(reading):
+    reading.taken = None
+    reading.value = 1.5
+    reading.count = '3'
+    data = ReadingSerializer().asdict_(reading)
+    assert data['taken'] is None
+    assert data['value'] == 1.5
+    assert data['count'] == '3'
+
+
+def test_model_field_converter_handler(reading):
+    ser = ReadingSerializer()
+    ser.asdict_(reading)
+    ser.add_handler(uuid.UUID, lambda u: u.hex)
+    data = ser.asdict_(reading)
+    assert data['uuid'] == reading.uuid.hex
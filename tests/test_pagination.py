@@ -0,0 +1,120 @@
+import base64
+import datetime
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import cereal
+from cereal.pagination import paginate
+from .testapp.models import Comment, Post
+
+
+class PostSerializer(cereal.Serializer):
+    exclude = ('content',)
+
+    class Meta:
+        model = Post
+
+
+class CommentSerializer(cereal.Serializer):
+    username = cereal.Field()
+
+    class Meta:
+        model = Comment
+
+
+@pytest.fixture
+def posts(db):
+    posts = [Post.objects.create(title=str(i), content='') for i in range(7)]
+    # duplicate timestamps to exercise the pk tiebreaker
+    created = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    for i, post in enumerate(posts):
+        post.created = created + datetime.timedelta(days=i // 2)
+        post.save()
+    return posts
+
+
+def titles(page):
+    return [row['title'] for row in page.results]
+
+
+def test_first_page(posts):
+    page = paginate(PostSerializer(), limit=3)
+    assert titles(page) == ['0', '1', '2']
+    assert page.previous_cursor is None
+    assert page.next_cursor
+
+
+def test_walk_forward_and_back(posts):
+    ser = PostSerializer()
+    ordering = ('-created', 'id')
+
+    page1 = paginate(ser, ordering=ordering, limit=3)
+    page2 = paginate(ser, cursor=page1.next_cursor, ordering=ordering,
+                     limit=3)
+    page3 = paginate(ser, cursor=page2.next_cursor, ordering=ordering,
+                     limit=3)
+    assert titles(page1) == ['6', '4', '5']
+    assert titles(page2) == ['2', '3', '0']
+    assert titles(page3) == ['1']
+    assert page3.next_cursor is None
+
+    back = paginate(ser, cursor=page3.previous_cursor, ordering=ordering,
+                    limit=3)
+    assert titles(back) == titles(page2)
+    back = paginate(ser, cursor=back.previous_cursor, ordering=ordering,
+                    limit=3)
+    assert titles(back) == titles(page1)
+    assert back.previous_cursor is None
+
+
+def test_single_query_per_page(posts):
+    page = paginate(PostSerializer(), limit=2)
+    with CaptureQueriesContext(connection) as ctx:
+        paginate(PostSerializer(), cursor=page.next_cursor, limit=2)
+    assert len(ctx.captured_queries) == 1
+    assert 'OFFSET' not in ctx.captured_queries[0]['sql']
+
+
+def test_queryset(posts):
+    queryset = Post.objects.filter(title__in=['1', '3', '5'])
+    page = paginate(PostSerializer(), queryset)
+    assert titles(page) == ['1', '3', '5']
+    assert page.next_cursor is None
+
+
+def test_invalid_cursor(posts):
+    with pytest.raises(ValueError):
+        paginate(PostSerializer(), cursor='not a cursor')
+
+
+@pytest.mark.parametrize('payload', [
+    ['next', [[1]]],
+    ['next', {'a': 1}],
+    ['next', 1],
+    ['next', ['one']],
+    ['next', [None]],
+])
+def test_tampered_cursor(posts, payload):
+    cursor = base64.urlsafe_b64encode(
+        json.dumps(payload).encode('utf-8')).decode('ascii')
+    with pytest.raises(ValueError, match='invalid cursor'):
+        paginate(PostSerializer(), cursor=cursor)
+
+
+def test_foreign_key_ordering(posts):
+    for post in posts[:3]:
+        Comment.objects.create(post=post, username=post.title)
+    ser = CommentSerializer()
+    page = paginate(ser, ordering=('post',), limit=2)
+    page = paginate(ser, cursor=page.next_cursor, ordering=('post',),
+                    limit=2)
+    assert [row['username'] for row in page.results] == ['2']
+
+
+@pytest.mark.parametrize('limit', [0, -1])
+def test_invalid_limit(posts, limit):
+    with pytest.raises(ValueError):
+        paginate(PostSerializer(), limit=limit)
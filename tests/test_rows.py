@@ -0,0 +1,97 @@
+import pickle
+import tracemalloc
+
+import pytest
+
+import cereal
+
+
+class ClassyClass():
+    def __init__(self, *args, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class InnerSerializer(cereal.Serializer):
+    name = cereal.Field()
+
+
+class RowSerializer(cereal.Serializer):
+    a = cereal.Field()
+    b = cereal.Field()
+    c = cereal.Field()
+    d = cereal.Field()
+    e = cereal.Field()
+    f = cereal.Field()
+    inner = cereal.SerializerField(InnerSerializer)
+
+
+def new_obj(i):
+    return ClassyClass(a=i, b='b', c=None, d=True, e=1.5, f=[i],
+                       inner=ClassyClass(name='inner'))
+
+
+def test_row_mapping():
+    row = RowSerializer().serialize(new_obj(1), raw=True, compact=True)
+    assert isinstance(row, cereal.Row)
+    assert row['a'] == 1
+    assert row.get('missing') is None
+    assert 'b' in row
+    assert list(row) == ['a', 'b', 'c', 'd', 'e', 'f', 'inner']
+    assert row == RowSerializer().serialize(new_obj(1), raw=True)
+    assert row.asdict() == dict(row)
+
+
+def test_row_pickle():
+    row = RowSerializer().row_(new_obj(1))
+    loaded = pickle.loads(pickle.dumps(row))
+    assert type(loaded) is RowSerializer.row_class
+    assert loaded == row
+    with pytest.raises(KeyError):
+        row['missing']
+
+
+def test_rows_share_keys():
+    rows = RowSerializer().serialize(
+        [new_obj(1), new_obj(2)], raw=True, compact=True)
+    assert type(rows[0]) is type(rows[1]) is RowSerializer.row_class
+    assert rows[0].keys() == rows[1].keys()
+
+
+@pytest.mark.parametrize('format', ['json', 'msgpack', 'cbor'])
+def test_encode_rows(format):
+    pytest.importorskip({'msgpack': 'msgpack', 'cbor': 'cbor2'}.get(
+        format, 'json'))
+    objs = [new_obj(1), new_obj(2)]
+    ser = RowSerializer()
+    assert ser.serialize(objs, format=format, compact=True) == \
+        ser.serialize(objs, format=format)
+
+
+def test_json_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        cereal.JSONEncoder().encode(object())
+
+
+class FlatSerializer(cereal.Serializer):
+    a = cereal.Field()
+    b = cereal.Field()
+    c = cereal.Field()
+    d = cereal.Field()
+    e = cereal.Field()
+    f = cereal.Field()
+
+
+def test_row_memory():
+    ser = FlatSerializer()
+    objs = [ClassyClass(a=i, b='b', c=None, d=True, e=1.5, f=2)
+            for i in range(5000)]
+
+    def measure(compact):
+        tracemalloc.start()
+        data = ser.serialize(objs, raw=True, compact=compact)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del data
+        return size
+
+    assert measure(True) < measure(False) * 0.6
@@ -0,0 +1,132 @@
+import datetime
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import cereal
+
+
+THREADS = 16
+CALLS = 500
+
+
+class ClassyClass():
+    def __init__(self, *args, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class InnerSerializer(cereal.Serializer):
+    name = cereal.Field()
+
+
+def counter():
+    for value in itertools.count():
+        # give up the GIL while the generator is running
+        time.sleep(0)
+        yield value
+
+
+class OuterSerializer(cereal.Serializer):
+    id = cereal.Field()
+    created = cereal.Field()
+    inner = cereal.SerializerField(InnerSerializer)
+    sequence = cereal.IteratorField(counter())
+    per_thread = cereal.IteratorField(itertools.count, per_thread=True)
+
+
+SERIALIZER = OuterSerializer().freeze()
+
+
+def run_threads(fn):
+    barrier = threading.Barrier(THREADS)
+
+    def worker(n):
+        barrier.wait()
+        return [fn(n, i) for i in range(CALLS)]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(worker, range(THREADS)))
+
+
+def test_concurrent_serialize():
+    created = datetime.datetime(2020, 1, 1)
+
+    def serialize(n, i):
+        obj = ClassyClass(id=(n, i), created=created,
+                          inner=[ClassyClass(name=n), ClassyClass(name=i)])
+        return json.loads(SERIALIZER.serialize(obj))
+
+    results = run_threads(serialize)
+
+    sequence = []
+    for n, rows in enumerate(results):
+        for i, data in enumerate(rows):
+            assert data['id'] == [n, i]
+            assert data['created'] == created.isoformat()
+            assert data['inner'] == [{'name': n}, {'name': i}]
+            assert data['per_thread'] == i
+            sequence.append(data['sequence'])
+
+    assert sorted(sequence) == list(range(THREADS * CALLS))
+
+
+def test_frozen_serializer():
+    ser = OuterSerializer().freeze()
+    assert ser.frozen
+    with pytest.raises(RuntimeError):
+        ser.add_handler(datetime.date, str)
+    assert OuterSerializer().frozen is False
+
+
+def test_freeze_does_not_affect_other_instances():
+    OuterSerializer().freeze()
+
+    ser = OuterSerializer()
+    ser.add_handler(datetime.datetime, lambda v: v.year)
+    obj = ClassyClass(id=1, created=datetime.datetime(2020, 1, 1),
+                      inner=ClassyClass(name=datetime.datetime(2021, 1, 1)))
+    data = ser.asdict_(obj)
+    assert data['created'] == 2020
+    assert data['inner'] == {'name': 2021}
+
+
+def test_frozen_converters_are_read_only():
+    from .testapp.models import Post
+
+    class PostSerializer(cereal.Serializer):
+        class Meta:
+            model = Post
+
+    ser = PostSerializer().freeze()
+    with pytest.raises(TypeError):
+        ser._converters[object] = []
+    ser.asdict_(Post(id=1, title='A Title', content=''))
+    assert set(ser._converters) >= {type(None), cereal.JSONEncoder}
+
+
+def test_frozen_unregistered_encoder_builds_tables_once(mocker):
+    from .testapp.models import Post
+
+    class PostSerializer(cereal.Serializer):
+        class Meta:
+            model = Post
+
+    class YearsEncoder(cereal.Encoder):
+        handlers = {datetime.datetime: lambda v: v.year}
+
+        def encode(self, data):
+            return data
+
+    ser = PostSerializer().freeze()
+    build = mocker.spy(ser, '_model_converter')
+    created = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    posts = [Post(id=i, title=str(i), content='', created=created)
+             for i in range(10)]
+    data = ser.serialize(posts, format=YearsEncoder())
+    assert [row['created'] for row in data] == [2020] * 10
+    assert build.call_count == len(ser.model_fields)
+    assert YearsEncoder not in ser._converters
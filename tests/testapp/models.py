@@ -11,3 +11,11 @@ class Comment(models.Model):
     post = models.ForeignKey(
         Post, related_name='comments', on_delete=models.CASCADE)
     username = models.CharField(max_length=128)
+
+
+class Reading(models.Model):
+    uuid = models.UUIDField()
+    value = models.DecimalField(max_digits=8, decimal_places=2)
+    count = models.IntegerField()
+    label = models.CharField(max_length=32)
+    taken = models.DateTimeField(null=True)
@@ -0,0 +1,11 @@
+# Settings for tests that need a database shared between processes.
+import os
+
+from .settings import *  # noqa
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["CEREAL_TEST_DB"],
+    }
+}